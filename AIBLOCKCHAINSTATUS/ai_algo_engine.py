@@ -1,5 +1,6 @@
 # ai_algo_engine.py
 import asyncio
+import os
 import random
 from datetime import datetime
 
@@ -18,6 +19,7 @@ class AIAlgoEngine:
     # Difficulty parameters for high performance simulation
     BASE_DIFFICULTY = 100.0
     DIFFICULTY_SWIRL_RANGE = 50.0  # Max +/- change in difficulty per block
+    MIN_DIFFICULTY = 50.0  # Floor the swirl can never push below
     
     # Networking parameters (Simulated)
     MAX_PEERS = 30
@@ -27,14 +29,33 @@ class AIAlgoEngine:
         self.manager = manager
         self.running = False
         self.task = None  # The main asyncio task reference
+        self._stop_event = asyncio.Event()  # Cleared by the caller (clear_stop) before each start
         self.engine_start_time = datetime.now()
+        self._rng = random.Random(os.urandom(16))  # Private stream, not the shared module state
         
     async def start_engine(self):
         """Main asynchronous loop for consistent AI monitoring and block cycling."""
         self.running = True
         self.manager.log_message(f"Async AI Engine started at: {self.engine_start_time.strftime('%H:%M:%S')}", color="teal")
+        loop = asyncio.get_running_loop()
         
-        while self.running:
+        # Bring the search pool up before the first block's clock starts;
+        # a stop during worker spawn ends the wait at once
+        warm_up_task = asyncio.create_task(self.manager.warm_up_search())
+        stop_task = asyncio.create_task(self._stop_event.wait())
+        try:
+            await asyncio.wait({warm_up_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            pending = [t for t in (warm_up_task, stop_task) if not t.done()]
+            for t in pending:
+                t.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        while not self._stop_event.is_set():
+            # Block cadence is measured on the loop's monotonic clock, so time
+            # spent competing counts towards the block time instead of adding to it
+            deadline = loop.time() + self.manager.BLOCK_TIME_SECONDS
+            
             # 1. Update difficulty and peer count for the new block
             difficulty = self._calculate_dynamic_difficulty()
             self._update_peer_count()
@@ -53,9 +74,23 @@ class AIAlgoEngine:
             else:
                 self.manager.log_message("Block solving failed or engine stopped.", color="red")
             
-            # 4. Await the next block time (the 5-minute cycle)
-            self.manager.log_message(f"\nBlock cycle complete. Waiting {self.manager.BLOCK_TIME_SECONDS}s for next mint...", color="gold")
-            await asyncio.sleep(self.manager.BLOCK_TIME_SECONDS)
+            if self._stop_event.is_set():
+                break
+            
+            # 4. Await the remainder of the block time (the 5-minute cycle),
+            #    waking early if a stop is requested
+            remaining = deadline - loop.time()
+            if remaining > 0:
+                self.manager.log_message(f"\nBlock cycle complete. Waiting {remaining:.2f}s for next mint...", color="gold")
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                self.manager.log_message(f"\nBlock cycle overran the {self.manager.BLOCK_TIME_SECONDS}s block time by {-remaining:.2f}s.", color="red")
+        
+        # Also covers a stop that arrived before the first cycle began
+        self.running = False
             
     async def _run_ai_competition(self, difficulty: float) -> str:
         """
@@ -65,42 +100,58 @@ class AIAlgoEngine:
         
         # We use a Task Group to simulate a pool of AI attempts (or peers)
         # and ensure non-blocking, high-performance concurrency.
+        # Task 1: Our node's AI solving attempt
+        our_attempt_task = asyncio.create_task(self.manager.solve_block_encryption(difficulty))
+
+        # Task 2: Simulated P2P consensus check (runs concurrently)
+        p2p_check_task = asyncio.create_task(self._simulate_p2p_consensus(difficulty))
+
+        # Task 3: Stop request from the GUI (ends the race deterministically)
+        stop_task = asyncio.create_task(self._stop_event.wait())
+
         try:
-            # Task 1: Our node's AI solving attempt
-            our_attempt_task = self.manager.solve_block_encryption(difficulty)
-            
-            # Task 2: Simulated P2P consensus check (runs concurrently)
-            p2p_check_task = self._simulate_p2p_consensus(difficulty)
-            
             # Wait for our AI attempt and the network consensus check concurrently
             results, pending = await asyncio.wait(
-                [our_attempt_task, p2p_check_task], 
+                {our_attempt_task, p2p_check_task, stop_task},
                 return_when=asyncio.FIRST_COMPLETED # Fastest task wins, simulating real-time race
             )
-            
+
+            if stop_task in results:
+                self.manager.log_message("AI Competition cancelled due to engine stop.", color="red")
+                return ""
+
             # Process the result from the fastest completed task
             if our_attempt_task in results:
+                proof = our_attempt_task.result()
+                if not proof:
+                    return "" # Our search ran out of time without a proof
+                
                 # Our AI pattern solved the block first!
                 self.manager.log_message("LOCAL AI WIN: Proof of Algorithm achieved first!", color="teal")
-                return our_attempt_task.result()
-            
+                return proof
+
             # If the consensus check finished first, another node beat us (simulated loss)
-            if p2p_check_task in results:
-                 self.manager.log_message("NETWORK LOSS: Another peer minted the block first.", color="red")
-                 return "" # Indicate a loss
-                 
+            self.manager.log_message("NETWORK LOSS: Another peer minted the block first.", color="red")
+            return "" # Indicate a loss
+
         except asyncio.CancelledError:
             self.manager.log_message("AI Competition cancelled due to engine stop.", color="red")
             return ""
         except Exception as e:
             self.manager.log_message(f"Critical Competition Error: {e}", color="red")
             return ""
+        finally:
+            # The losing branch must not keep running into the next cycle
+            pending = [t for t in (our_attempt_task, p2p_check_task, stop_task) if not t.done()]
+            for t in pending:
+                t.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
 
     async def _simulate_p2p_consensus(self, difficulty: float):
         """Simulates network monitoring and consensus checks."""
         # Simulates the time it takes to receive and validate a block from a peer.
         # This time is random but tied to difficulty and peer count.
-        simulated_network_latency = difficulty / 150 + random.uniform(0.5, 2.0)
+        simulated_network_latency = difficulty / 150 + self._rng.uniform(0.5, 2.0)
         
         self.manager.log_message(f"P2P Monitor running (Latency check: {simulated_network_latency:.2f}s)...")
         await asyncio.sleep(simulated_network_latency)
@@ -116,28 +167,30 @@ class AIAlgoEngine:
         """
         
         # Difficulty adjusts dynamically based on the last result and a random factor
-        current = self.manager.current_difficulty if self.manager.current_difficulty > 0 else self.BASE_DIFFICULTY
+        current = self.manager.current_difficulty or self.BASE_DIFFICULTY
+        swirl = self.DIFFICULTY_SWIRL_RANGE
         
-        # Introduce randomness (the 'swirl')
-        random_factor = random.uniform(-self.DIFFICULTY_SWIRL_RANGE, self.DIFFICULTY_SWIRL_RANGE)
-        
-        # Base adjustment (simulates network hash rate change)
-        difficulty = current + random_factor
-        
-        # Ensure difficulty stays above a minimum threshold
-        return max(difficulty, 50.0)
+        # Introduce randomness (the 'swirl') as a base adjustment
+        # (simulates network hash rate change), kept above a minimum threshold
+        return max(current + self._rng.uniform(-swirl, swirl), self.MIN_DIFFICULTY)
 
     def _update_peer_count(self):
         """Simulates live networking connection monitoring."""
         # Peer count fluctuates to simulate network volatility
-        self.manager.peer_count = random.randint(self.MIN_PEERS, self.MAX_PEERS)
+        self.manager.peer_count = self._rng.randint(self.MIN_PEERS, self.MAX_PEERS)
+        self.manager.state_changed.set()
         
+    def clear_stop(self):
+        """Re-arms the engine for a new run; call just before scheduling start_engine()."""
+        self._stop_event.clear()
+
     def stop_engine(self):
-        """Gracefully stops the asynchronous loop and cancels the main task."""
-        if self.running:
+        """
+        Requests a cooperative stop: sets the stop event, which ends the current race
+        or block wait without cancelling the task mid-update. The event is set even if
+        start_engine() has not begun running yet, so an early stop is never lost.
+        """
+        if not self._stop_event.is_set():
             self.running = False
             self.manager.log_message("Async AI Engine received STOP command.", color="red")
-            
-            # Cancel the main running task to interrupt the asyncio.sleep or asyncio.wait
-            if self.task:
-                self.task.cancel()
\ No newline at end of file
+            self._stop_event.set()
\ No newline at end of file
@@ -1,10 +1,18 @@
 # ai_algo_manager.py
 import json
 import csv
+import hashlib
 import random
 import os
 import asyncio
-from datetime import datetime
+import secrets
+import time
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Qt-free proof-of-work kernels, submitted to the search workers by reference
+from nonce_search import search_nonce_batch, hash_candidate
 
 # --- NOTE on EXTERNAL Dependencies ---
 # You would need to install the actual Gemini SDK here:
@@ -14,23 +22,51 @@ from datetime import datetime
 # Import the Engine (for circular dependency resolution, we import inside __init__)
 from ai_algo_engine import AIAlgoEngine 
 
+
+# Last formatted timestamp, keyed on the whole second it was formatted for
+_ts_cache = (0, "")
+
+def _now_str() -> str:
+    """Returns the local 'YYYY-mm-dd HH:MM:SS' time, reformatting at most once per second."""
+    global _ts_cache
+    sec = time.time_ns() // 1_000_000_000
+    if sec != _ts_cache[0]:
+        tm = time.localtime(sec)
+        _ts_cache = (sec, f"{tm.tm_year:04d}-{tm.tm_mon:02d}-{tm.tm_mday:02d} {tm.tm_hour:02d}:{tm.tm_min:02d}:{tm.tm_sec:02d}")
+    return _ts_cache[1]
+
+
 class AIAlgoManager:
     """
     Manages the core state, logging, blockchain simulation, and AI reward logic.
     Handles the 'degree of chance and luck' in reward distribution.
     """
-    
+
     # --- CONSTANTS ---
     BLOCK_REWARD = 5.0  # %AIA%
     REWARD_SYMBOL = "%AIA%"
     BLOCK_TIME_SECONDS = 5  # Simulation time for 5-minute block
     LUCK_FACTOR_MAX = 0.15 # Max 15% bonus/penalty based on luck
 
-    def __init__(self, log_terminal):
+    # Proof-of-work nonce search: sha256(header || nonce) under a difficulty target
+    # ~15ms of hashing per batch: short enough that a cancelled search leaves at most
+    # that much stale work per worker, long enough that per-round IPC stays in the noise
+    NONCE_BATCH_SIZE = 16384
+    DIFFICULTY_PER_TARGET_BIT = 6.0  # Difficulty points per required leading zero bit
+    SEARCH_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # Leave a core for the GUI
+
+    MAX_LOG_ENTRIES = 100_000  # Ring buffer size; oldest entries drop off first
+    LOG_BATCH_INTERVAL_MS = 50  # Log lines are sent to the GUI at most this often...
+    LOG_BATCH_MAX = 256  # ...unless this many are already waiting
+
+    def __init__(self):
         self.api_key = ""
-        self.log_entries = []
-        self.log_terminal = log_terminal
+        self.log_entries = deque(maxlen=self.MAX_LOG_ENTRIES)
+        self._log_batch = []  # Lines not yet handed to log_sink
+        self.log_sink = None  # Callable taking a list of (timestamp, message, color); see attach_log_sink
         self.is_running = False
+        self._rng = random.Random(os.urandom(16))  # Private stream, not the shared module state
+        self._executor = None  # Process pool for the nonce search, created on first use
         
         # --- Blockchain State ---
         self.block_height = 12345
@@ -39,15 +75,22 @@ class AIAlgoManager:
         self.balance = 0.0
         self.current_difficulty = 0.0 
         self.last_block_hash = "0x00000000000000000000000000000000"
+        # SHA-256 state after absorbing the header; copied per nonce candidate
+        self._header_hasher_base = hashlib.sha256(self.last_block_hash.encode())
+        # Set whenever the displayed state changes; the GUI awaits it instead of polling.
+        # Starts set so the first refresh shows the initial values.
+        self.state_changed = asyncio.Event()
+        self.state_changed.set()
         
         # --- AI Competition State ---
         # This list would track competing AI nodes, including ourselves (node_id: luck_modifier)
         self.competing_nodes = {} 
-        self.node_id = f"AIAlgoNode-{random.randint(1000, 9999)}"
+        self.node_id = f"AIAlgoNode-{self._rng.randint(1000, 9999)}"
 
         # Instantiate the Async Engine, passing itself as a reference
         self.engine = AIAlgoEngine(self)
         self.log_message(f"Node ID: {self.node_id} initialized.")
+        self._check_hash_backend()
 
     # --- Core AI/Blockchain Implementation ---
 
@@ -98,26 +141,108 @@ class AIAlgoManager:
         #     self.log_message(f"Gemini API Error: {e}", color="red")
         #     ai_proof = "FAILED"
         
-        # Placeholder simulation:
-        latency = current_difficulty / 100 + random.uniform(1, 3)
-        await asyncio.sleep(latency) 
-        ai_proof = f"AI_Solution_Proof_{random.getrandbits(64):X}"
+        # Without the LLM client, the work is a real, bounded SHA-256 nonce search
+        hit = await self._search_nonce(current_difficulty)
+        if hit is None:
+            self.log_message("AI block resolution reached the block-time deadline without a proof.", color="red")
+            return ""
+        
+        nonce, _ = hit
+        ai_proof = f"AI_Solution_Proof_{nonce.hex().upper()}"
         
         self.log_message(f"AI Proof of Solution received: {ai_proof[:20]}...", color="teal")
         return ai_proof
 
+    async def _search_nonce(self, current_difficulty: float):
+        """
+        Searches nonce batches on the process pool (one batch per worker per round)
+        until a digest meets the difficulty target or one block time elapses.
+        Returns (nonce_bytes, digest), or None at the deadline.
+        
+        Cancellation (a P2P win or an engine stop) is only observed between rounds:
+        batches already running in the pool finish, and batches not yet started are
+        dropped. NONCE_BATCH_SIZE bounds that stale work, and with it how long the
+        next competition's first round can queue behind it.
+        """
+        target_bits = min(int(current_difficulty / self.DIFFICULTY_PER_TARGET_BIT), 255)
+        threshold = ((1 << (256 - target_bits)) - 1).to_bytes(32, 'big')
+        header = self.last_block_hash.encode()
+        executor = self._get_executor()
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.BLOCK_TIME_SECONDS
+        batch_size = self.NONCE_BATCH_SIZE
+        batch_start = secrets.randbits(63)
+        
+        while loop.time() < deadline:
+            batches = [
+                loop.run_in_executor(executor, search_nonce_batch, header, batch_start + i * batch_size, batch_size, threshold)
+                for i in range(self.SEARCH_WORKERS)
+            ]
+            batch_start += self.SEARCH_WORKERS * batch_size
+            
+            hits = [hit for hit in await asyncio.gather(*batches) if hit]
+            if hits:
+                nonce, digest = min(hits)
+                nonce_bytes = nonce.to_bytes(8, 'big')
+                
+                # Validate the worker's answer against our own header state
+                if hash_candidate(self._header_hasher_base, nonce_bytes) != digest:
+                    raise RuntimeError(f"Nonce {nonce_bytes.hex()} failed local proof validation")
+                return nonce_bytes, digest
+        return None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Returns the nonce search pool, creating it on first use."""
+        if self._executor is None:
+            # Spawn fresh interpreters: forking the running (multi-threaded) Qt
+            # process can deadlock the child
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.SEARCH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def warm_up_search(self):
+        """
+        Spawns every search worker with a one-nonce batch before the first block,
+        so process start-up and imports are not charged to the first competition.
+        """
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        
+        header = self.last_block_hash.encode()
+        unreachable = bytes(32)  # No digest is <= all zeros in practice
+        await asyncio.gather(*(
+            loop.run_in_executor(executor, search_nonce_batch, header, i, 1, unreachable)
+            for i in range(self.SEARCH_WORKERS)
+        ))
+        self.log_message(f"Nonce search pool ready: {self.SEARCH_WORKERS} worker(s) warmed in {loop.time() - started:.2f}s.", color="teal")
+
+    def _check_hash_backend(self):
+        """Reports whether SHA-256 is served by OpenSSL (SHA-NI / ARMv8 crypto capable)."""
+        if type(self._header_hasher_base).__module__ == "_hashlib":
+            import ssl
+            self.log_message(f"SHA-256 backend: {ssl.OPENSSL_VERSION}")
+        else:
+            self.log_message("SHA-256 backend: CPython builtin (no OpenSSL). Proof hashing will be slow.", color="red")
+
     def distribute_reward(self, winner_node_id: str, difficulty: float):
         """
         Calculates the final reward based on the base reward, difficulty,
         and the "degree of chance and luck" for the highest achiever.
         """
         
+        symbol = self.REWARD_SYMBOL
+        luck_max = self.LUCK_FACTOR_MAX
+        
         # 1. Base Reward
         base_reward_amount = self.BLOCK_REWARD
         
         # 2. Degree of Chance/Luck Implementation
         # The 'luck' factor is tied to node characteristics or a random seed
-        luck_modifier = random.uniform(-self.LUCK_FACTOR_MAX, self.LUCK_FACTOR_MAX)
+        luck_modifier = self._rng.uniform(-luck_max, luck_max)
         
         # 3. Final Allocation
         final_reward = base_reward_amount * (1 + luck_modifier)
@@ -126,24 +251,26 @@ class AIAlgoManager:
         self.balance += final_reward
         self.block_height += 1
         self.current_difficulty = difficulty
-        self.last_block_hash = f"0x{random.getrandbits(256):064x}" # New block hash
+        block_hash = self.last_block_hash = "0x" + secrets.token_hex(32) # New block hash
+        self._header_hasher_base = hashlib.sha256(block_hash.encode())
+        self.state_changed.set()
 
         self.log_message(f"*** BLOCK MINTED: #{self.block_height} ***")
         self.log_message(f"Node: {winner_node_id} won with Difficulty: {difficulty:.2f}", color="gold")
-        self.log_message(f"Base Reward: {base_reward_amount} {self.REWARD_SYMBOL} | Luck Modifier: {luck_modifier:+.2f} ({self.REWARD_SYMBOL})", color="gold")
-        self.log_message(f"Final Reward Allocated: {final_reward:.4f} {self.REWARD_SYMBOL}. New Balance: {self.balance:.2f} {self.REWARD_SYMBOL}", color="teal")
+        self.log_message(f"Base Reward: {base_reward_amount} {symbol} | Luck Modifier: {luck_modifier:+.2f} ({symbol})", color="gold")
+        self.log_message(f"Final Reward Allocated: {final_reward:.4f} {symbol}. New Balance: {self.balance:.2f} {symbol}", color="teal")
         
         # 4. Stamping and File Logging
         self._stamp_block_metadata(final_reward)
 
     def _stamp_block_metadata(self, reward_amount: float):
         """Stamps all required metadata for the conclusive measurement."""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        timestamp = _now_str()
         
         # Hexadecimal, Bit, Plain Text, Binary (Conclusive Measurement)
         hex_data = self.last_block_hash[:10] 
         plain_text = f"Block {self.block_height} by {self.node_id}"
-        binary_data = bin(int(self.last_block_hash, 16))[:10] 
+        binary_data = "0b" + format(int(self.last_block_hash[2:4], 16), "08b") # Leading byte only
         mccos_ref = f"Ref-{self.block_height}-{timestamp}.mccos" # Simulated custom file reference
 
         self.log_message(f"Stamped Metadata: Time={timestamp}, Bit={binary_data}, Hex={hex_data}")
@@ -153,37 +280,70 @@ class AIAlgoManager:
 
     # --- Utility Methods (mostly from previous response, simplified) ---
 
+    def shutdown(self):
+        """Releases the nonce-search worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
     def log_message(self, message, color="teal"):
-        """Appends a color-coded message to the terminal and internal log."""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        """Appends a color-coded message to the internal log and queues it for the GUI."""
+        timestamp = _now_str()
         
         # 1. Update internal log list
         log_entry = {"timestamp": timestamp, "message": message, "color": color}
         self.log_entries.append(log_entry)
         
-        # 2. Update the PyQT QTextEdit widget (thread-safe operations required here 
-        #    if calling from the Engine, but for simplicity, we assume the GUI 
-        #    handles the threading safety or updates frequently)
-        html_color = {"teal": "#00FFCC", "red": "#FF5555", "gold": "#FFD700"}.get(color, "#00FFCC")
-        html_message = f'<span style="color: {html_color};">[{timestamp}] {message}</span><br>'
-        
-        self.log_terminal.insertHtml(html_message)
-        self.log_terminal.ensureCursorVisible()
+        # 2. Queue the line for the sink; the batch is flushed by a loop callback
+        #    (or at once when full), so the GUI renders many lines per call.
+        #    Without a sink (headless use) log_entries is the only record.
+        if self.log_sink is None:
+            return
+        batch = self._log_batch
+        batch.append((timestamp, message, color))
+        if len(batch) >= self.LOG_BATCH_MAX:
+            self._emit_log_batch()
+        elif len(batch) == 1:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._emit_log_batch()  # No loop running (start-up or plain scripts): deliver now
+            else:
+                # Under qasync this is the Qt event loop, so the flush lands on the GUI thread
+                loop.call_later(self.LOG_BATCH_INTERVAL_MS / 1000, self._emit_log_batch)
+
+    def attach_log_sink(self, sink):
+        """
+        Routes log batches to `sink` (a callable taking a list of (timestamp, message, color)),
+        replaying everything logged so far first.
+        """
+        self.log_sink = sink
+        self._log_batch = []  # Anything still queued is in log_entries and replayed below
+        sink([(e["timestamp"], e["message"], e["color"]) for e in self.log_entries])
+
+    def _emit_log_batch(self):
+        """Hands all queued log lines to the log sink in one direct call (no-op when nothing is queued)."""
+        batch = self._log_batch
+        if not batch:
+            return
+        self._log_batch = []
+        # The engine shares the sink's loop (qasync), so no signal or thread hop is needed
+        self.log_sink(batch)
 
     def save_log(self, file_name, file_format):
         """Saves the internal log data to JSON or CSV."""
-        data_to_save = [{"timestamp": e["timestamp"], "message": e["message"]} for e in self.log_entries]
+        # Entries are streamed straight from self.log_entries (no intermediate copy);
+        # the engine shares this loop, so nothing appends while the file is written
+        entries = self.log_entries
         
-        # ... (JSON/CSV saving logic remains the same) ...
         if file_format == 'json':
-            with open(file_name, 'w') as f:
-                json.dump(data_to_save, f, indent=4)
+            with open(file_name, 'w', buffering=1 << 20) as f:
+                json.dump([{"timestamp": e["timestamp"], "message": e["message"]} for e in entries], f, indent=4)
         elif file_format == 'csv':
-            with open(file_name, 'w', newline='') as f:
+            with open(file_name, 'w', newline='', buffering=1 << 20) as f:
                 writer = csv.writer(f)
                 writer.writerow(["Timestamp", "Message"])
-                for entry in data_to_save:
-                    writer.writerow([entry['timestamp'], entry['message']])
+                writer.writerows((e["timestamp"], e["message"]) for e in entries)
         
         self.log_message(f"Log saved successfully as {file_format.upper()}: {file_name}", color="gold")
         
@@ -1,64 +1,99 @@
 # main_gui.py
 import sys
 import asyncio
-import uuid
 from datetime import datetime
-from io import BytesIO
+from functools import lru_cache
 
 # PyQt Imports
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLineEdit, QPushButton, QTextEdit, QMenuBar, QAction, QFileDialog,
-    QLabel, QMessageBox, QFrame, QGridLayout
+    QLabel, QMessageBox, QFrame, QGridLayout, QDialog, QFormLayout, QDialogButtonBox
 )
-from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal, QMetaObject, Q_ARG, QGenericArgument
-from PyQt5.QtGui import QColor, QPalette, QFont, QPixmap, QImage
+from PyQt5.QtCore import Qt, QTimer, pyqtSlot
+from PyQt5.QtGui import QColor, QPalette, QFont, QPixmap, QImage, QTextCursor
 
 # External Libraries
-import qrcode
-from PIL import Image
+import qasync  # Runs asyncio on top of the Qt event loop
+
+try:
+    import segno  # Preferred QR encoder (fast matrix build, no imaging library needed)
+except ImportError:
+    segno = None
+    import qrcode  # Fallback; renders through Pillow
 
 # Import the core components
 from ai_algo_manager import AIAlgoManager
 
-# --- QThread for Asynchronous Engine (NOW WITH THREAD-SAFE SIGNAL) ---
-class AsyncEngineThread(QThread):
-    """Hosts the asyncio event loop and handles thread-safe logging."""
-    
-    # 🚨 Thread-Safe Signal: (message, color)
-    log_signal = pyqtSignal(str, str) 
+LOG_FMT = "AIAlgo_Log_%Y%m%d_%H%M%S"  # Default save-log file name (strftime pattern)
+
+# --- QR Rendering (memoized: the wallet address never changes per window) ---
+def _pack_mono_row(row, stride: int) -> bytes:
+    """
+    Packs one row of truthy/falsy pixels into `stride` bytes, most significant bit first.
+    Format_Mono rows are whole bytes, so `stride` is ceil(width / 8) and the final
+    byte is padded with 0 bits on the right.
+    """
+    packed = bytearray(stride)
+    for x, px in enumerate(row):
+        if px:
+            packed[x >> 3] |= 0x80 >> (x & 7)
+    return bytes(packed)
+
+@lru_cache(maxsize=32)
+def _render_qr_bits(data: str, box_size: int = 4, border: int = 2, error: str = "L") -> tuple:
+    """
+    Renders `data` as a 1-bit QR code (error level L/M/Q/H).
+    Returns (raw, width, height, stride, color_table) for a white-on-black
+    Format_Mono QImage. Only plain bytes are cached, never Qt objects, so
+    nothing outlives the QApplication.
+    """
+    if segno is not None:
+        qr = segno.make_qr(data, error=error, boost_error=False)
+        size = qr.symbol_size(scale=box_size, border=border)[0]
+        stride = (size + 7) // 8
+        
+        # One bit per pixel, each row padded to a whole byte (Format_Mono).
+        # Bit 1 is a dark module, drawn white on black.
+        raw = b"".join(_pack_mono_row(row, stride) for row in qr.matrix_iter(scale=box_size, border=border))
+        return raw, size, size, stride, (0xFF000000, 0xFFFFFFFF)
     
-    def __init__(self, engine, parent=None):
-        super().__init__(parent)
-        self.engine = engine
-        self.loop = asyncio.new_event_loop()
-        
-    def run(self):
-        """Sets the event loop and runs the engine start task."""
-        asyncio.set_event_loop(self.loop)
-        
-        # Inject the thread-safe logging mechanism into the manager's engine
-        # This replaces the direct GUI update with a signal emission
-        self.engine.manager.log_signal = self.log_signal
-        
-        self.engine.task = self.loop.create_task(self.engine.start_engine())
-        self.loop.run_forever() 
+    error_correction = {
+        "L": qrcode.constants.ERROR_CORRECT_L, "M": qrcode.constants.ERROR_CORRECT_M,
+        "Q": qrcode.constants.ERROR_CORRECT_Q, "H": qrcode.constants.ERROR_CORRECT_H,
+    }[error]
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=error_correction,
+        box_size=box_size,
+        border=border,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
 
-    def stop(self):
-        """Gracefully stops the engine and the asyncio loop."""
-        if self.engine.running:
-            self.engine.stop_engine()
-        
-        if self.engine.task and not self.engine.task.done():
-            # Schedule cancellation safely on the event loop thread
-            self.loop.call_soon_threadsafe(self.engine.task.cancel)
-        
-        # Stop the loop thread-safely
-        self.loop.call_soon_threadsafe(self.loop.stop)
-        self.wait()
+    # Default black-on-white keeps Pillow in 1-bit mode "1"; the colour table
+    # swaps it to the wallet's white-on-black look (bit 0 is a dark module).
+    # The packed rows are used as-is (no PNG round-trip).
+    img_pil = qr.make_image().get_image()
+    raw = img_pil.tobytes("raw", "1")
+    return raw, img_pil.width, img_pil.height, (img_pil.width + 7) // 8, (0xFFFFFFFF, 0xFF000000)
 
 # --- AIAlgoGUI Class (Fully Implemented) ---
 class AIAlgoGUI(QMainWindow):
+
+    MAX_TERMINAL_LINES = 5000  # Oldest terminal lines are dropped past this
+
+    # Start/stop button styles (parsed by Qt on every setStyleSheet, so keep them constant)
+    START_STYLE = "background-color: #FF5733; color: white; font-weight: bold;"
+    STOP_STYLE = "background-color: #008000; color: white; font-weight: bold;"
+
+    # Terminal rendering (built once, reused for every log line)
+    _HTML_COLORS = {"teal": "#00FFCC", "red": "#FF5555", "gold": "#FFD700"}
+    _HTML_OPEN = sys.intern('<span style="color: ')
+    _HTML_STAMP = sys.intern(';">[')
+    _HTML_SEP = sys.intern('] ')
+    _HTML_CLOSE = sys.intern('</span>')
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("PROOF OF A.I. ALGORITHM: CORE WALLET")
@@ -75,21 +110,27 @@ class AIAlgoGUI(QMainWindow):
         # 1. Create the essential logging terminal first.
         self.create_logging_terminal() 
         
-        # 2. Initialize the Manager immediately after the terminal is ready.
-        self.manager = AIAlgoManager(self.log_terminal) 
+        # 2. Initialize the Manager and route its log batches to the terminal.
+        #    Lines logged during construction (e.g. the node ID) are replayed on attach.
+        self.manager = AIAlgoManager()
+        self.manager.attach_log_sink(self.append_log_lines)
         
         # 3. Create GUI panels that rely on manager attributes.
         self.create_wallet_panel()
         self.create_api_panel()
-        
-        # 4. Set up the Async Engine Thread and connect the signal.
-        self.engine_thread = AsyncEngineThread(self.manager.engine)
-        self.engine_thread.log_signal.connect(self.thread_log_message) # 🚨 Thread-safe connection
-        
-        # 5. QTimer for periodic GUI status updates.
-        self.status_timer = QTimer()
-        self.status_timer.timeout.connect(self.update_status_labels)
-        self.status_timer.start(1000) # Update status every second
+        self._send_dialog = None  # Send Token dialog, built on first use
+        self._popup = None  # Shared message box for show_popup
+        
+        # 4. The Async Engine runs as a task on the Qt/asyncio loop (see __main__).
+        
+        # 5. Event-driven GUI status updates (no polling timer).
+        self._last_status = (None, None, None, None)  # Last (height, peers, balance, difficulty) pushed to the labels
+        # Bound formatters, built once; each runs only when its value changes
+        self._block_fmt = "Block: {}".format
+        self._peer_fmt = "Peers: {}".format
+        self._balance_fmt = ("{:.4f} " + self.manager.REWARD_SYMBOL).format
+        self._difficulty_fmt = "{:.2f}".format
+        self._refresh_task = None  # Started on first show (needs the event loop), cancelled on close
 
         self.manager.log_message("GUI Shell Initialized. Ready for API Key.")
         
@@ -107,7 +148,7 @@ class AIAlgoGUI(QMainWindow):
         palette.setColor(QPalette.Text, BRIGHT_TEAL)
         palette.setColor(QPalette.Button, DARK_GRAY)
         palette.setColor(QPalette.ButtonText, BRIGHT_TEAL)
-        self.status_text_color = BRIGHT_GOLD 
+        self._status_style = f"color: {BRIGHT_GOLD.name()};"  # One shared stylesheet string for the status labels
         self.setPalette(palette)
         
     def create_menu_bar(self):
@@ -159,8 +200,8 @@ class AIAlgoGUI(QMainWindow):
         # 4. Status Widgets (Block/Peers)
         self.block_label = QLabel("Block: 0")
         self.peer_label = QLabel("Peers: 0")
-        self.block_label.setStyleSheet(f"color: {self.status_text_color.name()};")
-        self.peer_label.setStyleSheet(f"color: {self.status_text_color.name()};")
+        self.block_label.setStyleSheet(self._status_style)
+        self.peer_label.setStyleSheet(self._status_style)
         
         status_hlayout = QHBoxLayout()
         status_hlayout.addWidget(self.block_label)
@@ -179,7 +220,7 @@ class AIAlgoGUI(QMainWindow):
         
         btn_qr_scan = QPushButton("Scan QR Code")
         btn_qr_scan.setStyleSheet("background-color: #8800AA; color: white;")
-        btn_qr_scan.clicked.connect(lambda: self.show_popup("Scan QR Code", "Simulated feature: Opens camera/file dialog for scanning."))
+        btn_qr_scan.clicked.connect(self._on_qr_scan)
         
         action_vlayout = QVBoxLayout()
         action_vlayout.addWidget(btn_send)
@@ -189,29 +230,29 @@ class AIAlgoGUI(QMainWindow):
         self.main_layout.addWidget(wallet_panel)
 
     def create_qr_widget(self, data: str) -> QWidget:
-        """Generates a QR code for the address and displays it in a widget."""
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=4,
-            border=2,
-        )
-        qr.add_data(data)
-        qr.make(fit=True)
+        """
+        Returns a placeholder for the address QR code. The (cached) pixmap is
+        rendered after the window's first show (see _populate_qr).
+        """
+        self._qr_data = data
+        self._qr_pixmap = None
 
-        img_pil = qr.make_image(fill_color="white", back_color="black").convert('RGB')
+        self._qr_label = QLabel("Generating QR...")
+        self._qr_label.setAlignment(Qt.AlignCenter)
         
-        # Convert PIL Image to QPixmap
-        data = BytesIO()
-        img_pil.save(data, "PNG")
-        qimage = QImage.fromData(data.getvalue())
-        pixmap = QPixmap.fromImage(qimage)
+        return self._qr_label
 
-        qr_label = QLabel()
-        qr_label.setPixmap(pixmap)
-        qr_label.setAlignment(Qt.AlignCenter)
-        
-        return qr_label
+    @pyqtSlot()
+    def _populate_qr(self):
+        """Renders the address QR code and swaps it into the placeholder label."""
+        if self._qr_pixmap is None:
+            raw, width, height, stride, color_table = _render_qr_bits(self._qr_data)
+            
+            # Zero-copy view over the cached `raw`; fromImage makes the pixmap's only copy
+            qimage = QImage(raw, width, height, stride, QImage.Format_Mono)
+            qimage.setColorTable(list(color_table))
+            self._qr_pixmap = QPixmap.fromImage(qimage)
+            self._qr_label.setPixmap(self._qr_pixmap)
 
     def create_api_panel(self):
         """Creates the API Key input and control buttons."""
@@ -227,7 +268,7 @@ class AIAlgoGUI(QMainWindow):
         api_panel.addWidget(load_btn)
         
         self.start_btn = QPushButton("START AI ALGORITHM")
-        self.start_btn.setStyleSheet("background-color: #FF5733; color: white; font-weight: bold;")
+        self.start_btn.setStyleSheet(self.START_STYLE)
         self.start_btn.clicked.connect(self.toggle_algorithm)
         api_panel.addWidget(self.start_btn)
         
@@ -241,6 +282,10 @@ class AIAlgoGUI(QMainWindow):
         
         self.log_terminal = QTextEdit() 
         self.log_terminal.setReadOnly(True)
+        
+        # One block per log line: Qt drops the oldest past the cap, so the
+        # document (and the cost of appending to it) stays bounded
+        self.log_terminal.document().setMaximumBlockCount(self.MAX_TERMINAL_LINES)
         self.log_terminal.setStyleSheet("""
             QTextEdit {
                 font-family: 'Courier New', Courier, monospace;
@@ -251,71 +296,114 @@ class AIAlgoGUI(QMainWindow):
         """)
         self.main_layout.addWidget(self.log_terminal)
 
-    # --- Thread-Safe Logging Method ---
-    def thread_log_message(self, message: str, color: str):
-        """Receives the signal from the engine thread and updates the log safely."""
-        # This function is called via the signal and runs in the GUI's main thread.
-        self.manager.log_message(message, color)
+    # --- Logging Method ---
+    def append_log_lines(self, batch: list):
+        """Receives a batch of (timestamp, message, color) lines and appends them in one edit."""
+        # Called directly by the manager's log flush, on the GUI thread.
+        colors = self._HTML_COLORS
+        html_open, html_stamp, html_sep, html_close = self._HTML_OPEN, self._HTML_STAMP, self._HTML_SEP, self._HTML_CLOSE
+        
+        # Always append at the document end, wherever the user left the cursor.
+        # Each line gets its own text block so the block cap can trim old lines;
+        # the edit block keeps the whole batch to a single relayout.
+        cursor = self.log_terminal.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        for timestamp, message, color in batch:
+            cursor.insertHtml("".join((html_open, colors.get(color, "#00FFCC"), html_stamp, timestamp, html_sep, message, html_close)))
+            cursor.insertBlock()
+        cursor.endEditBlock()
+        self.log_terminal.setTextCursor(cursor)
+        self.log_terminal.ensureCursorVisible()
 
     # --- Interaction and Logic Methods ---
     
+    async def _refresh_loop(self):
+        """Refreshes the status labels each time the manager reports a state change."""
+        state_changed = self.manager.state_changed
+        while True:
+            await state_changed.wait()
+            state_changed.clear()
+            self.update_status_labels()
+
     def update_status_labels(self):
-        """Updates all labels with current manager state."""
-        self.block_label.setText(f"Block: {self.manager.block_height}")
-        self.peer_label.setText(f"Peers: {self.manager.peer_count}")
-        self.balance_label.setText(f"{self.manager.balance:.4f} %AIA%")
-        
-        diff = f"{self.manager.current_difficulty:.2f}" if self.manager.current_difficulty > 0 else "N/A"
-        self.difficulty_label.setText(diff)
+        """Updates all labels with current manager state (no-op if nothing moved)."""
+        manager = self.manager
+        status = (manager.block_height, manager.peer_count, manager.balance, manager.current_difficulty)
+        last = self._last_status
+        if status == last:
+            return # setText would still schedule a repaint
+        self._last_status = status
+        height, peers, balance, difficulty = status
+        
+        # Only re-format (and re-set) the labels whose value actually changed
+        if height != last[0]:
+            self.block_label.setText(self._block_fmt(height))
+        if peers != last[1]:
+            self.peer_label.setText(self._peer_fmt(peers))
+        if balance != last[2]:
+            self.balance_label.setText(self._balance_fmt(balance))
+        if difficulty != last[3]:
+            self.difficulty_label.setText(self._difficulty_fmt(difficulty) if difficulty > 0 else "N/A")
 
+    @pyqtSlot()
     def load_api_key(self):
         """Loads key into the manager."""
         key = self.api_key_input.text().strip()
         self.manager.set_api_key(key)
         
+    @pyqtSlot()
     def toggle_algorithm(self):
         """Starts or stops the async engine."""
         if not self.manager.is_running:
             if not self.manager.set_api_key(self.api_key_input.text().strip()):
                 return
             
-            self.engine_thread.start()
+            engine = self.manager.engine
+            if self._engine_active():
+                self.manager.log_message("Engine is still shutting down; try again in a moment.", color="gold")
+                return
+            
+            engine.clear_stop()
+            engine.task = asyncio.ensure_future(engine.start_engine())
             self.manager.is_running = True
             
             self.start_btn.setText("STOP ALGORITHM")
-            self.start_btn.setStyleSheet("background-color: #008000; color: white; font-weight: bold;")
+            self.start_btn.setStyleSheet(self.STOP_STYLE)
         else:
-            self.engine_thread.stop()
-            self.manager.is_running = False
-            
-            self.start_btn.setText("START AI ALGORITHM")
-            self.start_btn.setStyleSheet("background-color: #FF5733; color: white; font-weight: bold;")
+            self._stop_engine()
+
+    def _engine_active(self) -> bool:
+        """True while an engine task exists and has not finished, whether or not it has taken its first step."""
+        task = self.manager.engine.task
+        return task is not None and not task.done()
 
+    def _stop_engine(self):
+        """Stops the engine, including a task that has not taken its first step yet, and resets the button."""
+        if self._engine_active():
+            self.manager.engine.stop_engine()
+        self.manager.is_running = False
+        
+        self.start_btn.setText("START AI ALGORITHM")
+        self.start_btn.setStyleSheet(self.START_STYLE)
+
+    @pyqtSlot()
     def send_token_popup(self):
         """
         Fully implemented 'Send Token' utility pop-up.
+        The dialog is built on first use and reused afterwards.
         """
-        dialog = QMessageBox()
-        dialog.setWindowTitle("Send %AIA% Token Transaction")
-        dialog.setIcon(QMessageBox.Information)
+        if self._send_dialog is None:
+            self._build_send_dialog()
         
-        # Create custom layout for input
-        layout = QVBoxLayout()
-        address_input = QLineEdit()
-        address_input.setPlaceholderText("Recipient Address (AIA-QTL-...)")
-        amount_input = QLineEdit()
-        amount_input.setPlaceholderText("Amount of %AIA% to send")
+        dialog = self._send_dialog
+        address_input = self._send_addr_input
+        amount_input = self._send_amount_input
+        address_input.clear()
+        amount_input.clear()
+        self._send_balance_label.setText(f"Current Balance: {self.manager.balance:.4f} %AIA%")
         
-        layout.addWidget(QLabel(f"Current Balance: {self.manager.balance:.4f} %AIA%"))
-        layout.addWidget(address_input)
-        layout.addWidget(amount_input)
-        
-        # Apply layout to the dialog
-        dialog.layout().addWidget(QWidget()).setLayout(layout)
-        dialog.setStandardButtons(QMessageBox.Send | QMessageBox.Cancel)
-        dialog.button(QMessageBox.Send).setText("Confirm TX")
-        
-        if dialog.exec_() == QMessageBox.Send:
+        if dialog.exec_() == QDialog.Accepted:
             recipient = address_input.text().strip()
             try:
                 amount = float(amount_input.text().strip())
@@ -332,9 +420,39 @@ class AIAlgoGUI(QMainWindow):
             except ValueError:
                 self.show_popup("Error", "Please enter a valid numeric amount.")
         
+    def _build_send_dialog(self):
+        """Constructs the Send Token dialog and keeps its input widgets for reuse."""
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Send %AIA% Token Transaction")
+        
+        # Balance on top, then the two inputs, then Confirm/Cancel
+        self._send_balance_label = QLabel()
+        self._send_addr_input = QLineEdit()
+        self._send_addr_input.setPlaceholderText("Recipient Address (AIA-QTL-...)")
+        self._send_amount_input = QLineEdit()
+        self._send_amount_input.setPlaceholderText("Amount of %AIA% to send")
+        
+        form = QFormLayout(dialog)
+        form.addRow(self._send_balance_label)
+        form.addRow("Recipient:", self._send_addr_input)
+        form.addRow("Amount:", self._send_amount_input)
+        
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.button(QDialogButtonBox.Ok).setText("Confirm TX")
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+        form.addRow(buttons)
+        self._send_dialog = dialog
+        
+    @pyqtSlot()
+    def _on_qr_scan(self):
+        """Handles the Scan QR Code button (placeholder)."""
+        self.show_popup("Scan QR Code", "Simulated feature: Opens camera/file dialog for scanning.")
+
+    @pyqtSlot()
     def save_log_popup(self):
         """Handles the save log menu action."""
-        default_name = f"AIAlgo_Log_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        default_name = datetime.now().strftime(LOG_FMT)
         
         file_name, file_filter = QFileDialog.getSaveFileName(self, 
             "Save Log File", 
@@ -350,18 +468,28 @@ class AIAlgoGUI(QMainWindow):
             self.manager.save_log(file_name, file_format)
                 
     def show_popup(self, title, message):
-        """Standard PyQT pop-up dialog."""
-        msg = QMessageBox()
+        """Standard PyQT pop-up dialog (one QMessageBox, reused for every message)."""
+        if self._popup is None:
+            self._popup = QMessageBox(self)
+        msg = self._popup
         msg.setWindowTitle(title)
         msg.setText(message)
         msg.exec_()
         
+    def showEvent(self, event):
+        """Lets the window paint first, then fills in the QR code on the next loop pass."""
+        super().showEvent(event)
+        if self._qr_pixmap is None:
+            QTimer.singleShot(0, self._populate_qr)
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh_loop())
+        
     def closeEvent(self, event):
-        """Ensure the background thread is stopped when closing the GUI."""
-        if self.manager.is_running:
-            self.toggle_algorithm() 
-        self.engine_thread.quit() 
-        self.engine_thread.wait()
+        """Ensure the engine is stopped when closing the GUI."""
+        if self.manager.is_running or self._engine_active():
+            self._stop_engine()
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()  # Awaited by __main__ once the loop stops
         super().closeEvent(event)
 
 if __name__ == '__main__':
@@ -369,6 +497,28 @@ if __name__ == '__main__':
     sys.path.append('.') 
     
     app = QApplication(sys.argv)
+    
+    # The Qt event loop is the asyncio loop: the engine runs on the GUI thread
+    loop = qasync.QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    
+    # Eager tasks run their first step inline, so per-cycle competition
+    # tasks that finish without suspending skip a scheduler round-trip.
+    if sys.version_info >= (3, 12):
+        loop.set_task_factory(asyncio.eager_task_factory)
+    
     window = AIAlgoGUI()
     window.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    with loop:
+        loop.run_forever()
+        
+        # Let a stop requested on close finish its cycle cleanly
+        engine_task = window.manager.engine.task
+        if engine_task is not None and not engine_task.done():
+            loop.run_until_complete(engine_task)
+        
+        # Let the cancelled status refresh loop unwind
+        refresh_task = window._refresh_task
+        if refresh_task is not None:
+            loop.run_until_complete(asyncio.gather(refresh_task, return_exceptions=True))
+        window.manager.shutdown()
\ No newline at end of file
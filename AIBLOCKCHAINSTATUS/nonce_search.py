@@ -0,0 +1,27 @@
+# nonce_search.py
+# Proof-of-work kernels run by the manager's search process pool.
+# Kept free of Qt imports so its functions pickle by reference to a light module.
+import hashlib
+
+
+def search_nonce_batch(header: bytes, batch_start: int, count: int, threshold: bytes):
+    """
+    Scans `count` nonces from `batch_start` for sha256(header || nonce) <= threshold.
+    Returns (nonce, digest) for the first hit, or None if the batch has no solution.
+    """
+    # Hashing dominates the per-nonce cost, so each nonce is encoded inline
+    base_copy = hashlib.sha256(header).copy
+    for nonce in range(batch_start, batch_start + count):
+        h = base_copy()
+        h.update(nonce.to_bytes(8, 'big'))
+        digest = h.digest()
+        if digest <= threshold:
+            return nonce, digest
+    return None
+
+
+def hash_candidate(header_hasher, nonce: bytes) -> bytes:
+    """Hashes an 8-byte nonce on top of a SHA-256 state that has absorbed the header (no header rehash)."""
+    h = header_hasher.copy()
+    h.update(nonce)
+    return h.digest()